@@ -1,4 +1,88 @@
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when Numba is not installed."""
+        def decorator(func):
+            return func
+        return decorator
+
+
+# Sentinel for absent evidence; never a key of a parent code table
+_MISSING = object()
+
+# Rows whose largest probability exceeds this are treated as deterministic
+_DETERMINISTIC_THRESHOLD = 0.9999
+
+# Row totals closer than this to 1.0 are treated as already normalized
+_NORM_TOL = 1e-9
+
+
+@njit(cache=True, fastmath=True)
+def _ema_update(row, obs_idx, lr, total):
+    """
+    Shift the mass of a packed CPT row toward the observed value in place.
+    
+    The EMA step maps a row total T to (1 - lr) * T + lr, so a normalized
+    row stays normalized and the sum/divide pass is only needed on drift.
+    Returns the new row total.
+    """
+    row *= 1.0 - lr
+    row[obs_idx] += lr
+    total = total * (1.0 - lr) + lr
+    if abs(total - 1.0) > _NORM_TOL:
+        row /= total
+        total = 1.0
+    return total
+
+
+@njit(cache=True, fastmath=True)
+def _ema_update_rows_loop(table, totals, rows, obs_idx, lr):
+    """Apply _ema_update for each (row, observed value) pair in order."""
+    for i in range(rows.shape[0]):
+        r = rows[i]
+        totals[r] = _ema_update(table[r], obs_idx[i], lr, totals[r])
+
+
+def _ema_update_rows_vectorized(table, totals, rows, obs_idx, lr):
+    """
+    Apply _ema_update for each (row, observed value) pair with NumPy ops.
+    
+    m sequential EMA steps on one row scale it by (1 - lr)^m and add
+    lr * (1 - lr)^(m - j) at the j-th observed value, so repeated rows are
+    folded into one scale plus a scatter-add. A drifted row is normalized
+    once after its first step, which divides that step's terms by its total.
+    """
+    one_minus_lr = 1.0 - lr
+    order = np.argsort(rows, kind="stable")
+    rows_sorted = rows[order]
+    obs_sorted = obs_idx[order]
+    uniq, start, counts = np.unique(rows_sorted, return_index=True, return_counts=True)
+    
+    # Number of later observations on the same row, per observation
+    remaining = np.repeat(start + counts, counts) - np.arange(rows.shape[0]) - 1
+    weights = lr * one_minus_lr ** remaining
+    
+    first_total = totals[uniq] * one_minus_lr + lr
+    drifted = np.abs(first_total - 1.0) > _NORM_TOL
+    scale = np.where(drifted, 1.0 / first_total, 1.0)
+    weights[start] *= scale
+    
+    decay = one_minus_lr ** counts
+    table[uniq] *= (decay * scale)[:, None]
+    np.add.at(table, (rows_sorted, obs_sorted), weights)
+    totals[uniq] = np.where(drifted, 1.0, 1.0 - (1.0 - totals[uniq]) * decay)
+
+
+# The compiled loop beats the sort/scatter overhead; without Numba vectorize instead
+_ema_update_rows = _ema_update_rows_loop if NUMBA_AVAILABLE else _ema_update_rows_vectorized
 
 
 class DynamicBayesianNetwork:
@@ -11,10 +95,30 @@ class DynamicBayesianNetwork:
         - add_inter_edge: Add edges across time slices (X_{t-1} -> Y_t)
         - set_cpt: Set Conditional Probability Tables for nodes
         - unroll: Unroll the network for T time steps
+        - iter_unroll / unroll_array: Lazy and NumPy index-grid variants of unroll
         - infer_node: Perform simple forward inference given evidence
+        - infer_node_array: Forward inference returning (labels, probs) arrays
+        - predict: Most likely value of a node given evidence
+        - sample_node: Draw a node value from its conditional distribution
+        - set_persistent_evidence: Clamp nodes for all time steps (evidence absorption)
+        - infer_node_fast: Forward inference from integer-encoded evidence
+        - infer_trajectory: Batched forward inference over nodes and time steps
         - update_cpt_from_data: Adaptive learning from streaming data
+        - update_cpt_from_data_batch: Vectorized adaptive learning from a batch of observations
     """
     
+    __slots__ = (
+        'name', 'slice_nodes', 'cpt',
+        '_intra_edges', '_inter_edges',
+        '_node_id', '_intra_by_child', '_inter_by_child',
+        '_parents_cache', '_parents_cache_valid',
+        '_cpt_values', '_cpt_value_idx', '_cpt_parent_codes', '_strides',
+        '_cpt_array', '_cpt_dtype', '_cpt_known', '_cpt_total',
+        '_cpt_argmax', '_cpt_cdf', '_deterministic', '_root_dist', '_row_dist',
+        '_persistent_evidence', '_row_plans',
+        '_vocab', '_fast_plans', '_code_tables_valid',
+    )
+    
     def __init__(self, name: str = "DBN"):
         """
         Initialize the Dynamic Bayesian Network.
@@ -24,9 +128,230 @@ class DynamicBayesianNetwork:
         """
         self.name = name
         self.slice_nodes: List[str] = []
-        self.intra_edges: List[Tuple[str, str]] = []
-        self.inter_edges: List[Tuple[str, str]] = []
+        self._node_id: Dict[str, int] = {}
+        # Edges in insertion order, exposed read-only through intra_edges/inter_edges
+        self._intra_edges: List[Tuple[str, str]] = []
+        self._inter_edges: List[Tuple[str, str]] = []
+        # Adjacency lists keyed by child, {child: [parent, ...]}, kept next to the edge lists
+        self._intra_by_child: Dict[str, List[str]] = {}
+        self._inter_by_child: Dict[str, List[str]] = {}
         self.cpt: Dict[str, Dict[Tuple, Dict[Any, float]]] = {}
+        
+        # Derived lookup tables, rebuilt lazily after structural changes
+        self._parents_cache: Dict[str, Tuple[Tuple[str, int], ...]] = {}
+        self._parents_cache_valid = False
+        
+        # Persistent (clamped) evidence and per-node row lookup plans built from it
+        self._persistent_evidence: Dict[str, Any] = {}
+        self._row_plans: Dict[str, Any] = {}
+        
+        # Packed CPTs: per-node value/parent codes and a (n_parent_combos, n_values) array
+        self._cpt_values: Dict[str, Tuple[Any, ...]] = {}
+        self._cpt_value_idx: Dict[str, Dict[Any, int]] = {}
+        self._cpt_parent_codes: Dict[str, Tuple[Dict[Any, int], ...]] = {}
+        self._strides: Dict[str, Tuple[int, ...]] = {}
+        # _cpt_array holds privately owned buffers that updates write in place; callers
+        # only receive read-only copies of single rows (see _row_copy)
+        self._cpt_array: Dict[str, np.ndarray] = {}
+        self._cpt_dtype: Dict[str, np.dtype] = {}
+        self._cpt_known: Dict[str, np.ndarray] = {}
+        self._cpt_total: Dict[str, np.ndarray] = {}
+        # Most likely value index per packed row, refreshed when rows change
+        self._cpt_argmax: Dict[str, np.ndarray] = {}
+        # Row-wise cumulative sums for sampling, built lazily and dropped on update
+        self._cpt_cdf: Dict[str, np.ndarray] = {}
+        # Rows driven near one-hot by updates: {row: one-hot copy of the CPT entry},
+        # returned by infer_node in place of the entry
+        self._deterministic: Dict[str, Dict[int, Dict[Any, float]]] = {}
+        
+        # ()-keyed CPT distributions, returned without a row lookup when the node has no parents
+        self._root_dist: Dict[str, Dict[Any, float]] = {}
+        # Dict-form CPT entry per packed row (None where no entry), returned by infer_node
+        self._row_dist: Dict[str, List[Optional[Dict[Any, float]]]] = {}
+        
+        # Integer evidence encoding: per-node value vocabularies and per-child plans
+        # (base_row, ((parent_id, offset, code_map, stride), ...)) where code_map maps
+        # a parent's vocabulary code to the child's CPT code; clamped parents are in base_row
+        self._vocab: Dict[str, Dict[Any, int]] = {}
+        self._fast_plans: Dict[str, Optional[Tuple[int, Tuple[Tuple[int, int, np.ndarray, int], ...]]]] = {}
+        self._code_tables_valid = False
+
+    def _invalidate(self) -> None:
+        """Drop derived lookup tables after the network structure changes."""
+        self._parents_cache = {}
+        self._parents_cache_valid = False
+        self._code_tables_valid = False
+        self._row_plans = {}
+
+    def _build_parents_cache(self) -> None:
+        """Build the per-node parent lookup table in a single pass over the edges."""
+        parents: Dict[str, List[Tuple[str, int]]] = {}
+        
+        # Intra-slice parents come first, followed by inter-slice parents
+        for child, intra_parents in self._intra_by_child.items():
+            parents.setdefault(child, []).extend((p, 0) for p in intra_parents)
+        for child, inter_parents in self._inter_by_child.items():
+            parents.setdefault(child, []).extend((p, -1) for p in inter_parents)
+        
+        self._parents_cache = {child: tuple(p) for child, p in parents.items()}
+        self._parents_cache_valid = True
+
+    def _pack_cpt(self, node: str) -> None:
+        """
+        Compile the dict form of a node's CPT into a flat probability array.
+        
+        Each parent position and the node's own values are mapped to integer
+        codes, so a CPT row is addressed by sum(code_i * stride_i) instead of
+        hashing a tuple of parent values.
+        
+        Args:
+            node: Node name
+            
+        Raises:
+            ValueError: If the parent value tuples have inconsistent lengths
+        """
+        cpt_table = self.cpt[node]
+        n_parents = len(next(iter(cpt_table))) if cpt_table else 0
+        
+        # Entries flagged deterministic by earlier updates keep their flag across a repack
+        flagged = {id(self._row_dist[node][row]) for row in self._deterministic.get(node, ())}
+        
+        value_idx: Dict[Any, int] = {}
+        parent_codes: List[Dict[Any, int]] = [{} for _ in range(n_parents)]
+        for parent_vals, dist in cpt_table.items():
+            if len(parent_vals) != n_parents:
+                raise ValueError(
+                    f"Inconsistent parent value tuples in CPT for node '{node}'"
+                )
+            for codes, value in zip(parent_codes, parent_vals):
+                codes.setdefault(value, len(codes))
+            for value in dist:
+                value_idx.setdefault(value, len(value_idx))
+        
+        # Row-major strides over the parent cardinalities
+        strides = [1] * n_parents
+        for i in range(n_parents - 2, -1, -1):
+            strides[i] = strides[i + 1] * len(parent_codes[i + 1])
+        n_rows = strides[0] * len(parent_codes[0]) if n_parents else 1
+        
+        table = np.zeros((n_rows, len(value_idx)), dtype=np.float64)
+        known = np.zeros(n_rows, dtype=bool)
+        row_dist: List[Optional[Dict[Any, float]]] = [None] * n_rows
+        for parent_vals, dist in cpt_table.items():
+            row = sum(codes[value] * stride for codes, value, stride
+                      in zip(parent_codes, parent_vals, strides))
+            known[row] = True
+            row_dist[row] = dist
+            for value, prob in dist.items():
+                table[row, value_idx[value]] = prob
+        
+        self._cpt_values[node] = tuple(value_idx)
+        self._cpt_value_idx[node] = value_idx
+        self._cpt_parent_codes[node] = tuple(parent_codes)
+        self._strides[node] = tuple(strides)
+        
+        # Totals track the float64 dict entries, which updates keep authoritative.
+        # Cast to the storage dtype, renormalizing rows that summed to one so the
+        # rounding of the cast does not leave them drifted
+        totals = table.sum(axis=1)
+        dtype = self._cpt_dtype[node]
+        if dtype != table.dtype:
+            normalized = np.abs(totals - 1.0) <= _NORM_TOL
+            table = table.astype(dtype)
+            table[normalized] /= table[normalized].sum(axis=1, keepdims=True)
+        
+        self._cpt_array[node] = table
+        self._cpt_known[node] = known
+        self._row_dist[node] = row_dist
+        self._cpt_total[node] = totals
+        self._cpt_argmax[node] = np.zeros(n_rows, dtype=np.int64)
+        self._deterministic[node] = {}
+        self._refresh_row_stats(node, np.flatnonzero(known).tolist())
+        if flagged:
+            rows = [row for row, dist in enumerate(row_dist) if id(dist) in flagged]
+            self._refresh_row_stats(node, rows, updated=True)
+        
+        if list(cpt_table) == [()]:
+            self._root_dist[node] = cpt_table[()]
+        else:
+            self._root_dist.pop(node, None)
+        
+        self._code_tables_valid = False
+        self._row_plans.pop(node, None)
+
+    def _build_code_tables(self) -> None:
+        """
+        Build the integer evidence encoding used by infer_node_fast.
+        
+        A node's vocabulary lists its own CPT values followed by any other
+        values its children's CPTs condition on. Parents clamped by persistent
+        evidence are folded into each child's base row, as in _build_row_plan.
+        
+        Raises:
+            ValueError: If a parent with a CPT-conditioned child is not a slice node
+        """
+        vocab = {node: dict(self._cpt_value_idx.get(node, {})) for node in self.slice_nodes}
+        
+        matched = []
+        for child, parent_codes in self._cpt_parent_codes.items():
+            parents = self.get_parents(child)
+            if len(parents) != len(parent_codes):
+                continue
+            matched.append(child)
+            for (parent, _), codes in zip(parents, parent_codes):
+                if parent not in self._node_id:
+                    raise ValueError(f"Parent '{parent}' of '{child}' is not a slice node")
+                parent_vocab = vocab[parent]
+                for value in codes:
+                    parent_vocab.setdefault(value, len(parent_vocab))
+        
+        fast_plans = {}
+        for child in matched:
+            base = 0
+            free_parents = []
+            for (parent, offset), codes, stride in zip(
+                self.get_parents(child), self._cpt_parent_codes[child], self._strides[child]
+            ):
+                if parent in self._persistent_evidence:
+                    code = codes.get(self._persistent_evidence[parent])
+                    if code is None:
+                        fast_plans[child] = None
+                        break
+                    base += code * stride
+                    continue
+                code_map = np.full(len(vocab[parent]), -1, dtype=np.int64)
+                for value, code in codes.items():
+                    code_map[vocab[parent][value]] = code
+                free_parents.append((self._node_id[parent], offset, code_map, stride))
+            else:
+                fast_plans[child] = (base, tuple(free_parents))
+        
+        self._vocab = vocab
+        self._fast_plans = fast_plans
+        self._code_tables_valid = True
+
+    def _combo_index(self, node: str, parent_values: Tuple) -> Optional[int]:
+        """
+        Get the packed row index for a tuple of parent values.
+        
+        Args:
+            node: Node name
+            parent_values: Tuple of parent values
+            
+        Returns:
+            Row index into the packed CPT array, or None if any value is unknown
+        """
+        parent_codes = self._cpt_parent_codes[node]
+        if len(parent_values) != len(parent_codes):
+            return None
+        
+        row = 0
+        for codes, value, stride in zip(parent_codes, parent_values, self._strides[node]):
+            code = codes.get(value)
+            if code is None:
+                return None
+            row += code * stride
+        return row
 
     def add_node(self, node: str) -> None:
         """
@@ -35,8 +360,10 @@ class DynamicBayesianNetwork:
         Args:
             node: Node name to add
         """
-        if node not in self.slice_nodes:
+        if node not in self._node_id:
+            self._node_id[node] = len(self.slice_nodes)
             self.slice_nodes.append(node)
+            self._invalidate()
 
     def add_intra_edge(self, parent: str, child: str) -> None:
         """
@@ -46,7 +373,9 @@ class DynamicBayesianNetwork:
             parent: Parent node name
             child: Child node name
         """
-        self.intra_edges.append((parent, child))
+        self._intra_edges.append((parent, child))
+        self._intra_by_child.setdefault(child, []).append(parent)
+        self._invalidate()
 
     def add_inter_edge(self, parent_prev: str, child_curr: str) -> None:
         """
@@ -56,9 +385,26 @@ class DynamicBayesianNetwork:
             parent_prev: Parent node name at time t-1
             child_curr: Child node name at time t
         """
-        self.inter_edges.append((parent_prev, child_curr))
+        self._inter_edges.append((parent_prev, child_curr))
+        self._inter_by_child.setdefault(child_curr, []).append(parent_prev)
+        self._invalidate()
+
+    @property
+    def intra_edges(self) -> Tuple[Tuple[str, str], ...]:
+        """Intra-slice edges as (parent, child) pairs in insertion order; add with add_intra_edge."""
+        return tuple(self._intra_edges)
 
-    def set_cpt(self, node: str, cpt_table: Dict[Tuple, Dict[Any, float]]) -> None:
+    @property
+    def inter_edges(self) -> Tuple[Tuple[str, str], ...]:
+        """Inter-slice edges as (parent_prev, child_curr) pairs in insertion order; add with add_inter_edge."""
+        return tuple(self._inter_edges)
+
+    def set_cpt(
+        self,
+        node: str,
+        cpt_table: Dict[Tuple, Dict[Any, float]],
+        dtype: Any = np.float64
+    ) -> None:
         """
         Set the Conditional Probability Table (CPT) for a node.
         
@@ -66,6 +412,9 @@ class DynamicBayesianNetwork:
             node: Node name
             cpt_table: Dictionary mapping parent values to probability distributions
                       Format: {parent_values_tuple: {node_value: probability}}
+            dtype: Float dtype of the packed probability array. np.float32 halves
+                   the memory traffic of inference at the cost of precision in the
+                   returned probabilities and the dict form after updates
                       
         Example:
             For a Decision node with parents (Price, Volatility):
@@ -78,8 +427,11 @@ class DynamicBayesianNetwork:
             {(): {'High': 0.6, 'Low': 0.4}}
         """
         self.cpt[node] = cpt_table
+        self._cpt_dtype[node] = np.dtype(dtype)
+        self._deterministic.pop(node, None)
+        self._pack_cpt(node)
 
-    def get_parents(self, node: str) -> List[Tuple[str, int]]:
+    def get_parents(self, node: str) -> Tuple[Tuple[str, int], ...]:
         """
         Get all parent nodes for a given node.
         
@@ -87,22 +439,12 @@ class DynamicBayesianNetwork:
             node: Node name
             
         Returns:
-            List of tuples (parent_node_name, time_offset)
+            Tuple of (parent_node_name, time_offset) pairs
             where time_offset is 0 for intra-slice edges and -1 for inter-slice edges
         """
-        parents = []
-        
-        # Add intra-slice parents (same time step)
-        for parent, child in self.intra_edges:
-            if child == node:
-                parents.append((parent, 0))
-        
-        # Add inter-slice parents (previous time step)
-        for parent, child in self.inter_edges:
-            if child == node:
-                parents.append((parent, -1))
-        
-        return parents
+        if not self._parents_cache_valid:
+            self._build_parents_cache()
+        return self._parents_cache.get(node, ())
 
     def infer_node(
         self,
@@ -121,40 +463,418 @@ class DynamicBayesianNetwork:
         Returns:
             Probability distribution over node values: {value: probability}
             
+        Raises:
+            ValueError: If CPT is not defined or required evidence is missing
+        """
+        # Root nodes (no graph parents and a ()-keyed CPT) return their only row directly,
+        # or its one-hot form once updates have made it deterministic
+        root_dist = self._root_dist.get(node)
+        if root_dist is not None and not self.get_parents(node):
+            return self._deterministic[node].get(0, root_dist)
+        
+        if node not in self.cpt:
+            raise ValueError(f"No CPT defined for node '{node}'")
+        
+        # Rows updated to near one-hot short-circuit to an exact one-hot distribution
+        row = self._row_index(node, t, evidence)
+        one_hot = self._deterministic[node].get(row)
+        if one_hot is not None:
+            return one_hot
+        
+        return self._row_dist[node][row]
+
+    def infer_node_array(
+        self,
+        node: str,
+        t: int,
+        evidence: Dict[Tuple[str, int], Any],
+    ) -> Tuple[Tuple[Any, ...], np.ndarray]:
+        """
+        Perform simple forward inference for a node at time t, returning arrays.
+        
+        The most likely value is labels[probs.argmax()].
+        
+        Args:
+            node: Node name to infer
+            t: Time step
+            evidence: Dictionary mapping (node_name, time) to observed values
+            
+        Returns:
+            Tuple (labels, probs) where probs[i] is the probability of labels[i].
+            probs is a read-only copy of the packed CPT row
+            
         Raises:
             ValueError: If CPT is not defined or required evidence is missing
         """
         # Get node's CPT
         if node not in self.cpt:
             raise ValueError(f"No CPT defined for node '{node}'")
-        node_cpt = self.cpt[node]
         
-        # Get parent nodes and their values from evidence
+        row = self._row_index(node, t, evidence)
+        return self._cpt_values[node], self._row_copy(node, row)
+
+    def _row_copy(self, node: str, row: int) -> np.ndarray:
+        """Copy a packed CPT row into a read-only array that later updates do not touch."""
+        probs = self._cpt_array[node][row].copy()
+        probs.setflags(write=False)
+        return probs
+
+    def predict(
+        self,
+        node: str,
+        t: int,
+        evidence: Dict[Tuple[str, int], Any],
+    ) -> Any:
+        """
+        Predict the most likely value of a node at time t.
+        
+        Reads a cached per-row argmax instead of scanning the distribution.
+        Ties go to the value listed first in the CPT entry, as with
+        max(dist, key=dist.get).
+        
+        Args:
+            node: Node name to predict
+            t: Time step
+            evidence: Dictionary mapping (node_name, time) to observed values
+            
+        Returns:
+            The most likely node value
+            
+        Raises:
+            ValueError: If CPT is not defined or required evidence is missing
+        """
+        if node not in self.cpt:
+            raise ValueError(f"No CPT defined for node '{node}'")
+        
+        row = self._row_index(node, t, evidence)
+        return self._cpt_values[node][self._cpt_argmax[node][row]]
+
+    def sample_node(
+        self,
+        node: str,
+        t: int,
+        evidence: Dict[Tuple[str, int], Any],
+        rng: Optional[np.random.Generator] = None,
+    ) -> Any:
+        """
+        Draw a value for a node at time t from its conditional distribution.
+        
+        Uses a binary search over the cumulative CPT row, e.g. for forward
+        simulation of an unrolled network.
+        
+        Args:
+            node: Node name to sample
+            t: Time step
+            evidence: Dictionary mapping (node_name, time) to observed values
+            rng: Random generator to draw from (default: a fresh default_rng())
+            
+        Returns:
+            The sampled node value
+            
+        Raises:
+            ValueError: If CPT is not defined or required evidence is missing
+        """
+        if node not in self.cpt:
+            raise ValueError(f"No CPT defined for node '{node}'")
+        if rng is None:
+            rng = np.random.default_rng()
+        
+        row = self._row_index(node, t, evidence)
+        cdf = self._cpt_cdf.get(node)
+        if cdf is None:
+            cdf = self._cpt_cdf[node] = np.cumsum(self._cpt_array[node], axis=1)
+        
+        # Scale by the row total so rows that do not sum to one still sample correctly
+        cdf_row = cdf[row]
+        idx = np.searchsorted(cdf_row, rng.random() * cdf_row[-1], side='right')
+        return self._cpt_values[node][min(idx, len(cdf_row) - 1)]
+
+    def _row_index(self, node: str, t: int, evidence: Dict[Tuple[str, int], Any]) -> int:
+        """
+        Resolve the packed CPT row for a node at time t from evidence.
+        
+        Each parent value is mapped to its integer code and accumulated as
+        code * stride, so no tuple of parent values is built or hashed.
+        
+        Args:
+            node: Node name with a CPT
+            t: Time step
+            evidence: Dictionary mapping (node_name, time) to observed values
+            
+        Returns:
+            Row index into the packed CPT array
+            
+        Raises:
+            ValueError: If required evidence is missing or has no CPT entry
+        """
+        plan = self._row_plans.get(node, _MISSING)
+        if plan is _MISSING:
+            plan = self._build_row_plan(node)
+        
+        if plan is not None:
+            row, free_parents, _ = plan
+            for parent_node, time_offset, codes, stride in free_parents:
+                code = codes.get(evidence.get((parent_node, t + time_offset), _MISSING))
+                if code is None:
+                    break
+                row += code * stride
+            else:
+                if self._row_dist[node][row] is not None:
+                    return row
+        
+        raise self._lookup_error(node, t, evidence)
+
+    def _build_row_plan(
+        self, node: str
+    ) -> Optional[Tuple[int, Tuple[Tuple[str, int, Dict[Any, int], int], ...], np.ndarray]]:
+        """
+        Build and cache the row lookup plan for a node.
+        
+        Parents clamped by persistent evidence are absorbed into a constant
+        row offset, leaving only the free parents to resolve per call.
+        
+        Args:
+            node: Node name with a CPT
+        
+        Returns:
+            Tuple (base_row, free_parents, free_strides) where free_parents holds
+            (parent_node, time_offset, codes, stride), or None if the CPT does not
+            match the node's parents or a clamped value has no CPT entry
+        """
         parents = self.get_parents(node)
+        parent_codes = self._cpt_parent_codes[node]
         
-        # Handle root nodes (no parents)
-        if len(parents) == 0:
-            return node_cpt[()]
+        plan = None
+        if len(parents) == len(parent_codes):
+            base = 0
+            free_parents = []
+            for (parent_node, time_offset), codes, stride in zip(
+                parents, parent_codes, self._strides[node]
+            ):
+                if parent_node not in self._persistent_evidence:
+                    free_parents.append((parent_node, time_offset, codes, stride))
+                    continue
+                code = codes.get(self._persistent_evidence[parent_node])
+                if code is None:
+                    break
+                base += code * stride
+            else:
+                free_strides = np.asarray([p[3] for p in free_parents], dtype=np.int64)
+                plan = (base, tuple(free_parents), free_strides)
         
-        # Gather parent values from evidence
+        self._row_plans[node] = plan
+        return plan
+
+    def _lookup_error(
+        self, node: str, t: int, evidence: Dict[Tuple[str, int], Any]
+    ) -> ValueError:
+        """Build the error for a failed row lookup: first missing parent, else unknown values."""
         parent_vals = []
-        for parent_node, time_offset in parents:
+        for parent_node, time_offset in self.get_parents(node):
+            if parent_node in self._persistent_evidence:
+                parent_vals.append(self._persistent_evidence[parent_node])
+                continue
             evidence_key = (parent_node, t + time_offset)
             if evidence_key not in evidence:
-                raise ValueError(
+                return ValueError(
                     f"Missing evidence for parent '{parent_node}' "
                     f"at time {t + time_offset}"
                 )
             parent_vals.append(evidence[evidence_key])
+        return ValueError(
+            f"No CPT entry for node '{node}' with parent values {tuple(parent_vals)}"
+        )
+
+    def set_persistent_evidence(self, evidence: Dict[str, Any]) -> None:
+        """
+        Clamp nodes to fixed values at every time step (evidence absorption).
         
-        # Look up probability distribution in CPT
-        parent_vals_tuple = tuple(parent_vals)
-        if parent_vals_tuple not in node_cpt:
-            raise ValueError(
-                f"No CPT entry for node '{node}' with parent values {parent_vals_tuple}"
-            )
+        Children of clamped nodes fold those parents into a constant CPT row
+        offset, so later lookups only resolve the remaining parents. Clamped
+        values take precedence over per-call evidence for the same node.
+        Applies to infer_node, infer_node_array, infer_node_fast,
+        infer_trajectory, predict and sample_node. Replaces any previously
+        set persistent evidence.
+        
+        Args:
+            evidence: Dictionary mapping node_name to its clamped value
+        """
+        self._persistent_evidence = dict(evidence)
+        self._row_plans = {}
+        self._code_tables_valid = False
+
+    def clear_persistent_evidence(self) -> None:
+        """Remove all persistent evidence set with set_persistent_evidence."""
+        self.set_persistent_evidence({})
+
+    def encode_evidence(self, evidence: Dict[Tuple[str, int], Any], T: int) -> np.ndarray:
+        """
+        Encode evidence as integer value codes for infer_node_fast.
+        
+        Args:
+            evidence: Dictionary mapping (node_name, time) to observed values
+            T: Number of time steps to encode; evidence outside 0..T-1 is dropped
+            
+        Returns:
+            int64 array of shape (len(slice_nodes), T) holding each observed value's
+            vocabulary code, or -1 where nothing is observed
+            
+        Raises:
+            ValueError: If a node is not a slice node or a value is unknown
+        """
+        if not self._code_tables_valid:
+            self._build_code_tables()
+        
+        evidence_arr = np.full((len(self.slice_nodes), T), -1, dtype=np.int64)
+        for (node, t), value in evidence.items():
+            if not 0 <= t < T:
+                continue
+            node_id = self._node_id.get(node)
+            if node_id is None:
+                raise ValueError(f"Node '{node}' is not a slice node")
+            code = self._vocab[node].get(value)
+            if code is None:
+                raise ValueError(f"Unknown value {value!r} for node '{node}'")
+            evidence_arr[node_id, t] = code
+        return evidence_arr
+
+    def infer_node_fast(
+        self,
+        node_id: int,
+        t: int,
+        evidence_arr: np.ndarray,
+    ) -> Tuple[Tuple[Any, ...], np.ndarray]:
+        """
+        Perform forward inference for a node at time t from encoded evidence.
+        
+        Same result as infer_node_array, but parent values are read as
+        evidence_arr[parent_id, t + offset] instead of hashing (name, time) keys.
+        Parents clamped by persistent evidence are not read from evidence_arr.
+        
+        Args:
+            node_id: Index of the node in slice_nodes
+            t: Time step
+            evidence_arr: Encoded evidence from encode_evidence
+            
+        Returns:
+            Tuple (labels, probs) where probs[i] is the probability of labels[i].
+            probs is a read-only copy of the packed CPT row
+            
+        Raises:
+            ValueError: If CPT is not defined or required evidence is missing
+        """
+        node = self.slice_nodes[node_id]
+        if node not in self.cpt:
+            raise ValueError(f"No CPT defined for node '{node}'")
+        if not self._code_tables_valid:
+            self._build_code_tables()
+        if node not in self._fast_plans:
+            raise ValueError(f"CPT for node '{node}' does not match its parents")
+        plan = self._fast_plans[node]
+        if plan is None:
+            raise ValueError(f"No CPT entry for node '{node}' with its persistent evidence")
+        
+        row, free_parents = plan
+        for parent_id, time_offset, code_map, stride in free_parents:
+            parent_t = t + time_offset
+            value_code = -1
+            if 0 <= parent_t < evidence_arr.shape[1]:
+                value_code = evidence_arr[parent_id, parent_t]
+            if value_code < 0:
+                raise ValueError(
+                    f"Missing evidence for parent '{self.slice_nodes[parent_id]}' "
+                    f"at time {parent_t}"
+                )
+            code = code_map[value_code]
+            if code < 0:
+                raise ValueError(
+                    f"No CPT entry for node '{node}' with parent "
+                    f"'{self.slice_nodes[parent_id]}' at time {parent_t}"
+                )
+            row += int(code) * stride
+        
+        if not self._cpt_known[node][row]:
+            raise ValueError(f"No CPT entry for node '{node}' at time {t}")
+        
+        return self._cpt_values[node], self._row_copy(node, row)
+
+    def infer_trajectory(
+        self,
+        nodes: List[str],
+        T: int,
+        evidence: Dict[Tuple[str, int], Any],
+    ) -> np.ndarray:
+        """
+        Perform forward inference for several nodes over time steps 0..T-1.
+        
+        Parent values are encoded into an integer code matrix per node, turned
+        into packed row indices with one dot product against the strides, and
+        all rows are gathered from the CPT array in a single indexing step.
+        
+        Args:
+            nodes: Node names to infer
+            T: Number of time steps
+            evidence: Dictionary mapping (node_name, time) to observed values
+            
+        Returns:
+            Array of shape (len(nodes) * T, max_values) where row n * T + t holds
+            the distribution of nodes[n] at time t. Column j corresponds to
+            get_values(nodes[n])[j]; nodes with fewer values are zero-padded
+            
+        Raises:
+            ValueError: If CPT is not defined or required evidence is missing
+        """
+        for node in nodes:
+            if node not in self.cpt:
+                raise ValueError(f"No CPT defined for node '{node}'")
+        
+        width = max((len(self._cpt_values[node]) for node in nodes), default=0)
+        dtype = np.result_type(*(self._cpt_array[node] for node in nodes), np.float32)
+        out = np.zeros((len(nodes) * T, width), dtype=dtype)
+        
+        for n, node in enumerate(nodes):
+            plan = self._row_plans.get(node, _MISSING)
+            if plan is _MISSING:
+                plan = self._build_row_plan(node)
+            if plan is None:
+                raise self._lookup_error(node, 0, evidence)
+            base, free_parents, free_strides = plan
+        
+            # Integer codes of the free parents for every time step, shape (T, n_free)
+            code_mat = np.empty((T, len(free_parents)), dtype=np.int64)
+            for i, (parent_node, time_offset, codes, _) in enumerate(free_parents):
+                for t in range(T):
+                    code = codes.get(evidence.get((parent_node, t + time_offset), _MISSING))
+                    if code is None:
+                        raise self._lookup_error(node, t, evidence)
+                    code_mat[t, i] = code
+        
+            rows = base + code_mat @ free_strides
+            unknown = np.flatnonzero(~self._cpt_known[node][rows])
+            if unknown.size:
+                raise self._lookup_error(node, int(unknown[0]), evidence)
+        
+            table = self._cpt_array[node]
+            out[n * T:(n + 1) * T, :table.shape[1]] = table[rows]
         
-        return node_cpt[parent_vals_tuple]
+        return out
+
+    def get_values(self, node: str) -> Tuple[Any, ...]:
+        """
+        Get the values a node can take, in packed CPT column order.
+        
+        Args:
+            node: Node name
+            
+        Returns:
+            Tuple of node values
+            
+        Raises:
+            ValueError: If CPT is not defined
+        """
+        if node not in self.cpt:
+            raise ValueError(f"No CPT defined for node '{node}'")
+        return self._cpt_values[node]
 
     def unroll(self, T: int) -> List[List[Tuple[str, int]]]:
         """
@@ -169,10 +889,38 @@ class DynamicBayesianNetwork:
         Returns:
             List of time slices, where each slice contains (node_name, time) tuples
         """
-        slices = []
+        return [[(node, t) for node in nodes] for t, nodes in self.iter_unroll(T)]
+
+    def iter_unroll(self, T: int) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+        """
+        Lazily unroll the network structure over T time steps.
+        
+        Unlike unroll, no (node_name, time) tuples are materialized.
+        
+        Args:
+            T: Number of time steps to unroll
+            
+        Yields:
+            Tuples (time, slice_nodes) for t = 0..T-1
+        """
+        nodes = tuple(self.slice_nodes)
         for t in range(T):
-            slices.append([(node, t) for node in self.slice_nodes])
-        return slices
+            yield t, nodes
+
+    def unroll_array(self, T: int) -> np.ndarray:
+        """
+        Unroll the network structure over T time steps as an index grid.
+        
+        Args:
+            T: Number of time steps to unroll
+            
+        Returns:
+            int32 array of shape (T, N, 2) where entry [t, i] is [i, t] and i
+            indexes slice_nodes
+        """
+        node_ids = np.arange(len(self.slice_nodes), dtype=np.int32)
+        times = np.arange(T, dtype=np.int32)
+        return np.stack(np.broadcast_arrays(node_ids[None, :], times[:, None]), axis=-1)
 
     def update_cpt_from_data(
         self,
@@ -199,28 +947,179 @@ class DynamicBayesianNetwork:
         if node not in self.cpt:
             raise ValueError(f"CPT for node '{node}' not found")
         
+        row = self._combo_index(node, parent_values)
+        if row is None or observed_value not in (self._row_dist[node][row] or ()):
+            self._seed_cpt_entry(node, parent_values, observed_value, row)
+            row = self._combo_index(node, parent_values)
+        
+        value_idx = self._cpt_value_idx[node][observed_value]
+        self._apply_packed_updates(node, [row], [value_idx], {row: parent_values}, lr)
+
+    def update_cpt_from_data_batch(
+        self,
+        node: str,
+        observations: List[Tuple[Tuple, Any]],
+        lr: float = 0.1
+    ) -> None:
+        """
+        Adaptively update CPT from a batch of observations (online learning).
+        
+        Equivalent to calling update_cpt_from_data for each observation in
+        order, but runs of observations already covered by the packed CPT are
+        resolved to row indices and applied in one vectorized step.
+        
+        Args:
+            node: Node name to update
+            observations: List of (parent_values, observed_value) pairs
+            lr: Learning rate (0 < lr <= 1). Higher values adapt faster
+            
+        Raises:
+            ValueError: If the node has no CPT defined
+        """
+        if node not in self.cpt:
+            raise ValueError(f"CPT for node '{node}' not found")
+        
+        rows: List[int] = []
+        obs_idx: List[int] = []
+        row_parent_values: Dict[int, Tuple] = {}
+        for parent_values, observed_value in observations:
+            row = self._combo_index(node, parent_values)
+            if row is None or observed_value not in (self._row_dist[node][row] or ()):
+                # Seeding may repack and renumber rows: flush pending rows first
+                self._apply_packed_updates(node, rows, obs_idx, row_parent_values, lr)
+                rows, obs_idx, row_parent_values = [], [], {}
+                self._seed_cpt_entry(node, parent_values, observed_value, row)
+                row = self._combo_index(node, parent_values)
+            
+            rows.append(row)
+            obs_idx.append(self._cpt_value_idx[node][observed_value])
+            row_parent_values[row] = parent_values
+        
+        self._apply_packed_updates(node, rows, obs_idx, row_parent_values, lr)
+
+    def _apply_packed_updates(
+        self,
+        node: str,
+        rows: List[int],
+        obs_idx: List[int],
+        row_parent_values: Dict[int, Tuple],
+        lr: float
+    ) -> None:
+        """
+        Apply EMA updates to packed CPT rows, mirror them into the dict form and
+        refresh their cached stats.
+        
+        Shared by update_cpt_from_data and update_cpt_from_data_batch. A single
+        observation calls the _ema_update kernel directly, skipping the batch
+        kernel's loop dispatch or sort/scatter. Packed CPTs stored in a narrower
+        dtype are updated on float64 rows rebuilt from the dict form, so the dict
+        keeps full precision and the packed rows are cast from it.
+        """
+        if not rows:
+            return
+        
+        table = self._cpt_array[node]
+        totals = self._cpt_total[node]
+        value_idx = self._cpt_value_idx[node]
+        changed = list(row_parent_values)
+        narrow = table.dtype != np.float64
+        if narrow:
+            work = np.zeros((len(changed), table.shape[1]))
+            for i, row in enumerate(changed):
+                for value, prob in self._row_dist[node][row].items():
+                    work[i, value_idx[value]] = prob
+            work_totals = totals[changed]
+            local = {row: i for i, row in enumerate(changed)}
+            rows = [local[row] for row in rows]
+        else:
+            work, work_totals = table, totals
+        
+        if len(rows) == 1:
+            row = rows[0]
+            work_totals[row] = _ema_update(work[row], obs_idx[0], lr, float(work_totals[row]))
+        else:
+            _ema_update_rows(
+                work, work_totals,
+                np.asarray(rows, dtype=np.int64), np.asarray(obs_idx, dtype=np.int64), lr
+            )
+        
+        if narrow:
+            table[changed] = work
+            totals[changed] = work_totals
+            work_rows = range(len(changed))
+        else:
+            work_rows = changed
+        
+        # Mirror the updated rows back into the dict form before refreshing the row
+        # stats, which read the dict entries
+        for row, work_row in zip(changed, work_rows):
+            distribution = self.cpt[node][row_parent_values[row]]
+            probs = work[work_row].tolist()
+            for value in distribution:
+                distribution[value] = probs[value_idx[value]]
+        
+        self._refresh_row_stats(node, row_parent_values, updated=True)
+
+    def _refresh_row_stats(self, node: str, rows: Iterable[int], updated: bool = False) -> None:
+        """
+        Refresh the cached argmax of changed packed rows from their dict entries.
+        
+        The argmax follows each entry's own key order, so ties resolve as
+        max(dist, key=dist.get). Rows changed by an update (updated=True) also
+        have their deterministic flag re-evaluated: the largest probability over
+        the row total must exceed _DETERMINISTIC_THRESHOLD. Rows as given to
+        set_cpt are never flagged.
+        """
+        self._cpt_cdf.pop(node, None)
+        row_dist = self._row_dist[node]
+        value_idx = self._cpt_value_idx[node]
+        argmax = self._cpt_argmax[node]
+        deterministic = self._deterministic[node]
+        for row in rows:
+            dist = row_dist[row]
+            if not dist:
+                continue
+            winner = max(dist, key=dist.get)
+            argmax[row] = value_idx[winner]
+            if not updated:
+                continue
+            
+            if dist[winner] <= _DETERMINISTIC_THRESHOLD * sum(dist.values()):
+                deterministic.pop(row, None)
+                continue
+            one_hot = deterministic.get(row)
+            if one_hot is None or one_hot.get(winner) != 1.0 or len(one_hot) != len(dist):
+                deterministic[row] = {value: 1.0 if value == winner else 0.0 for value in dist}
+
+    def _seed_cpt_entry(
+        self,
+        node: str,
+        parent_values: Tuple,
+        observed_value: Any,
+        row: Optional[int]
+    ) -> None:
+        """
+        Add a value missing from a CPT entry with the 1e-6 sentinel probability.
+        
+        The entry is created for a new parent combination. The packed row is
+        filled in place, or the CPT is repacked if new parent or node values
+        appeared, so the observation can then be applied as a packed update.
+        """
         # Initialize parent_values entry if it doesn't exist
         if parent_values not in self.cpt[node]:
             self.cpt[node][parent_values] = {}
         
         distribution = self.cpt[node][parent_values]
         
-        # Initialize observed_value with small probability if not present
-        if observed_value not in distribution:
-            distribution[observed_value] = 1e-6
+        # Initialize observed_value with small probability
+        distribution[observed_value] = 1e-6
         
-        # Update probabilities using exponential moving average
-        all_values = list(distribution.keys())
-        for value in all_values:
-            if value == observed_value:
-                # Increase probability of observed value
-                distribution[value] = distribution[value] * (1 - lr) + lr
-            else:
-                # Decrease probability of other values
-                distribution[value] = distribution[value] * (1 - lr)
-        
-        # Normalize to ensure probabilities sum to 1
-        total = sum(distribution.values())
-        if total > 0:
-            for value in all_values:
-                distribution[value] /= total
\ No newline at end of file
+        obs_idx = self._cpt_value_idx[node].get(observed_value)
+        if row is None or obs_idx is None:
+            self._pack_cpt(node)
+        else:
+            table = self._cpt_array[node]
+            table[row, obs_idx] = 1e-6
+            self._cpt_known[node][row] = True
+            self._row_dist[node][row] = distribution
+            self._cpt_total[node][row] = sum(distribution.values())
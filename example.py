@@ -56,28 +56,29 @@ def main():
         ("PriceMove", 0): "Increase",
     }
 
-    market_t1_dist = dbn.infer_node("MarketSentiment", t=1, evidence={})
-    most_likely_market_t1 = max(market_t1_dist, key=market_t1_dist.get)
+    market_labels, market_probs = dbn.infer_node_array("MarketSentiment", t=1, evidence={})
+    most_likely_market_t1 = dbn.predict("MarketSentiment", t=1, evidence={})
 
     evidence[("MarketSentiment", 1)] = most_likely_market_t1
 
     # infer PriceMove at t=1
-    price_t1_dist = dbn.infer_node("PriceMove", t=1, evidence=evidence)
+    price_labels, price_probs = dbn.infer_node_array("PriceMove", t=1, evidence=evidence)
 
     print("Observed at t=0:")
     print("  MarketSentiment_0 =", evidence[("MarketSentiment", 0)])
     print("  PriceMove_0       =", evidence[("PriceMove", 0)])
     print()
 
-    print("Predicted MarketSentiment_1 (from root CPT):", market_t1_dist)
+    print("Predicted MarketSentiment_1 (from root CPT):",
+          dict(zip(market_labels, market_probs.tolist())))
     print(f"Using MarketSentiment_1 = {most_likely_market_t1}")
     print()
 
     print("P(PriceMove_1 | evidence) =")
-    for v, p in price_t1_dist.items():
+    for v, p in zip(price_labels, price_probs):
         print(f"  {v:9s}: {p:.3f}")
 
-    predicted_label = max(price_t1_dist, key=price_t1_dist.get)
+    predicted_label = dbn.predict("PriceMove", t=1, evidence=evidence)
     print("\n=> Predicted next move:", predicted_label)
 
 
@@ -0,0 +1,284 @@
+import random
+import unittest
+
+import numpy as np
+
+from dbn import (
+    DynamicBayesianNetwork,
+    _ema_update_rows_loop,
+    _ema_update_rows_vectorized,
+)
+
+
+def build_dbn() -> DynamicBayesianNetwork:
+    """Two-node network with a root A and a child B | A."""
+    dbn = DynamicBayesianNetwork()
+    dbn.add_node("A")
+    dbn.add_node("B")
+    dbn.add_intra_edge("A", "B")
+    dbn.set_cpt("A", {(): {"a": 0.6, "b": 0.4}})
+    dbn.set_cpt("B", {
+        ("a",): {"x": 0.5, "y": 0.5},
+        ("b",): {"x": 0.2, "y": 0.7, "z": 0.1},
+    })
+    return dbn
+
+
+class TestEmaUpdateRows(unittest.TestCase):
+    """The vectorized EMA kernel must match applying the updates one by one."""
+
+    def check_equivalent(self, table, totals, rows, obs_idx, lr):
+        expected_table, expected_totals = table.copy(), totals.copy()
+        for row, idx in zip(rows, obs_idx):
+            # Plain-Python replay of _ema_update, one observation at a time
+            expected_table[row] *= 1.0 - lr
+            expected_table[row, idx] += lr
+            total = expected_totals[row] * (1.0 - lr) + lr
+            if abs(total - 1.0) > 1e-9:
+                expected_table[row] /= total
+                total = 1.0
+            expected_totals[row] = total
+
+        for kernel in (_ema_update_rows_loop, _ema_update_rows_vectorized):
+            got_table, got_totals = table.copy(), totals.copy()
+            kernel(got_table, got_totals, np.asarray(rows, dtype=np.int64),
+                   np.asarray(obs_idx, dtype=np.int64), lr)
+            np.testing.assert_allclose(got_table, expected_table, rtol=0, atol=1e-12)
+            np.testing.assert_allclose(got_totals, expected_totals, rtol=0, atol=1e-12)
+
+    def test_repeated_rows(self):
+        rng = np.random.default_rng(0)
+        table = rng.random((5, 4))
+        table /= table.sum(axis=1, keepdims=True)
+        rows = rng.integers(0, 5, size=200)
+        obs_idx = rng.integers(0, 4, size=200)
+        self.check_equivalent(table, np.ones(5), rows, obs_idx, 0.05)
+
+    def test_drifted_rows(self):
+        rng = np.random.default_rng(1)
+        table = rng.random((3, 3))
+        totals = table.sum(axis=1)
+        self.check_equivalent(table, totals, [2, 0, 2, 2, 1, 0], [0, 1, 1, 2, 0, 0], 0.3)
+
+    def test_single_observation(self):
+        table = np.array([[0.25, 0.75]])
+        self.check_equivalent(table, np.ones(1), [0], [1], 0.1)
+
+
+class TestUpdateCpt(unittest.TestCase):
+    """Packed, scalar and batched updates must agree with the dict-form EMA."""
+
+    def test_batch_matches_sequential(self):
+        random.seed(0)
+        observations = [
+            ((random.choice("abc"),), random.choice("xyyz")) for _ in range(300)
+        ]
+        sequential, batched = build_dbn(), build_dbn()
+        for parent_values, observed_value in observations:
+            sequential.update_cpt_from_data("B", parent_values, observed_value, lr=0.05)
+        batched.update_cpt_from_data_batch("B", observations, lr=0.05)
+
+        self.assertEqual(list(sequential.cpt["B"]), list(batched.cpt["B"]))
+        for parent_values, dist in sequential.cpt["B"].items():
+            for value, prob in dist.items():
+                self.assertAlmostEqual(prob, batched.cpt["B"][parent_values][value], places=12)
+            evidence = {("A", 0): parent_values[0]}
+            labels, probs = batched.infer_node_array("B", 0, evidence)
+            for value, prob in zip(labels, probs.tolist()):
+                self.assertAlmostEqual(prob, dist.get(value, 0.0), places=12)
+            self.assertEqual(batched.predict("B", 0, evidence), max(dist, key=dist.get))
+            self.assertEqual(batched.predict("B", 0, evidence), sequential.predict("B", 0, evidence))
+
+    def test_batch_predict_follows_update(self):
+        batched = build_dbn()
+        batched.update_cpt_from_data_batch("B", [(("a",), "y")] * 3, lr=0.3)
+        self.assertGreater(batched.cpt["B"][("a",)]["y"], batched.cpt["B"][("a",)]["x"])
+        self.assertEqual(batched.predict("B", 0, {("A", 0): "a"}), "y")
+
+    def test_saturated_rows_match(self):
+        sequential, batched = build_dbn(), build_dbn()
+        observations = [(("a",), "y")] * 200
+        for parent_values, observed_value in observations:
+            sequential.update_cpt_from_data("B", parent_values, observed_value, lr=0.1)
+            sequential.update_cpt_from_data("A", (), "b", lr=0.1)
+        batched.update_cpt_from_data_batch("B", observations, lr=0.1)
+        batched.update_cpt_from_data_batch("A", [((), "b")] * 200, lr=0.1)
+
+        evidence = {("A", 0): "a"}
+        self.assertEqual(sequential.infer_node("B", 0, evidence), {"x": 0.0, "y": 1.0})
+        self.assertEqual(batched.infer_node("B", 0, evidence), {"x": 0.0, "y": 1.0})
+        self.assertEqual(sequential.infer_node("A", 0, {}), {"a": 0.0, "b": 1.0})
+        self.assertEqual(batched.infer_node("A", 0, {}), {"a": 0.0, "b": 1.0})
+
+    def test_float32_storage_keeps_float64_dict(self):
+        random.seed(1)
+        observations = [((random.choice("ab"),), random.choice("xyz")) for _ in range(300)]
+        reference, sequential, batched = build_dbn(), build_dbn(), build_dbn()
+        for dbn in (sequential, batched):
+            dbn.set_cpt("B", {key: dict(dist) for key, dist in dbn.cpt["B"].items()},
+                        dtype=np.float32)
+        for parent_values, observed_value in observations:
+            reference.update_cpt_from_data("B", parent_values, observed_value, lr=0.07)
+            sequential.update_cpt_from_data("B", parent_values, observed_value, lr=0.07)
+        batched.update_cpt_from_data_batch("B", observations, lr=0.07)
+
+        for parent_values, dist in reference.cpt["B"].items():
+            self.assertEqual(sequential.cpt["B"][parent_values], dist)
+            for value, prob in dist.items():
+                self.assertAlmostEqual(batched.cpt["B"][parent_values][value], prob, places=12)
+            self.assertAlmostEqual(sum(batched.cpt["B"][parent_values].values()), 1.0, places=12)
+
+    def test_scalar_update(self):
+        dbn = build_dbn()
+        dbn.update_cpt_from_data("B", ("a",), "x", lr=0.1)
+        self.assertAlmostEqual(dbn.cpt["B"][("a",)]["x"], 0.55)
+        self.assertAlmostEqual(dbn.cpt["B"][("a",)]["y"], 0.45)
+        self.assertEqual(dbn.predict("B", 0, {("A", 0): "a"}), "x")
+
+        labels, probs = dbn.infer_node_array("B", 0, {("A", 0): "a"})
+        self.assertAlmostEqual(probs[labels.index("x")], 0.55)
+
+    def test_unseen_value_gets_sentinel(self):
+        dbn = build_dbn()
+        dbn.update_cpt_from_data("B", ("a",), "z", lr=0.1)
+        dist = dbn.cpt["B"][("a",)]
+        self.assertEqual(list(dist), ["x", "y", "z"])
+        self.assertAlmostEqual(dist["z"], (0.1 + 0.9e-6) / (1.0 + 0.9e-6), places=12)
+        self.assertAlmostEqual(sum(dist.values()), 1.0)
+
+
+def build_temporal_dbn() -> DynamicBayesianNetwork:
+    """Root M, P | (M_t, P_{t-1}) with an inter-slice edge, and S | P_t."""
+    dbn = DynamicBayesianNetwork()
+    for node in ("M", "P", "S"):
+        dbn.add_node(node)
+    dbn.add_intra_edge("M", "P")
+    dbn.add_inter_edge("P", "P")
+    dbn.add_intra_edge("P", "S")
+    dbn.set_cpt("M", {(): {"bull": 0.6, "bear": 0.4}})
+    dbn.set_cpt("P", {
+        ("bull", "up"): {"up": 0.8, "down": 0.2},
+        ("bull", "down"): {"up": 0.6, "down": 0.4},
+        ("bear", "up"): {"up": 0.55, "down": 0.45},
+        ("bear", "down"): {"up": 0.3, "down": 0.7},
+    })
+    dbn.set_cpt("S", {("up",): {"buy": 0.5, "hold": 0.5}, ("down",): {"sell": 0.9, "hold": 0.1}})
+    return dbn
+
+
+class TestInference(unittest.TestCase):
+    """Every inference entry point must agree with infer_node_array on the same evidence."""
+
+    T = 4
+
+    def setUp(self):
+        self.dbn = build_temporal_dbn()
+        self.evidence = {
+            ("M", 0): "bull", ("P", 0): "up",
+            ("M", 1): "bear", ("P", 1): "down",
+            ("M", 2): "bull", ("P", 2): "down",
+            ("M", 3): "bear", ("P", 3): "up",
+        }
+
+    def expected(self, node, t):
+        labels, probs = self.dbn.infer_node_array(node, t, self.evidence)
+        return dict(zip(labels, probs.tolist()))
+
+    def check_entry_points(self):
+        dbn, evidence = self.dbn, self.evidence
+        evidence_arr = dbn.encode_evidence(evidence, self.T)
+        for node in ("P", "S"):
+            for t in range(1, self.T):
+                expected = self.expected(node, t)
+                # infer_node returns the CPT entry, which may omit zero-probability values
+                dist = dbn.infer_node(node, t, evidence)
+                self.assertEqual(dist, {value: expected[value] for value in dist})
+                self.assertAlmostEqual(sum(expected.values()), sum(dist.values()))
+
+                labels, probs = dbn.infer_node_fast(dbn.slice_nodes.index(node), t, evidence_arr)
+                self.assertEqual(dict(zip(labels, probs.tolist())), expected)
+                self.assertFalse(probs.flags.writeable)
+
+                self.assertEqual(dbn.predict(node, t, evidence), max(dist, key=dist.get))
+
+    def test_entry_points_match(self):
+        self.check_entry_points()
+
+    def test_infer_trajectory(self):
+        # P at t=0 conditions on P_{-1}, so observe it before the horizon
+        self.evidence[("P", -1)] = "down"
+        out = self.dbn.infer_trajectory(["P", "S"], self.T, self.evidence)
+        self.assertEqual(out.shape, (2 * self.T, 3))
+        for n, node in enumerate(["P", "S"]):
+            labels = self.dbn.get_values(node)
+            for t in range(self.T):
+                row = dict(zip(labels, out[n * self.T + t, :len(labels)].tolist()))
+                self.assertEqual(row, self.expected(node, t))
+            self.assertTrue(np.all(out[n * self.T:(n + 1) * self.T, len(labels):] == 0.0))
+
+    def test_persistent_evidence(self):
+        self.dbn.set_persistent_evidence({"M": "bear"})
+        for t in range(self.T):
+            self.evidence[("M", t)] = "bull"
+        clamped = {key: value for key, value in self.evidence.items() if key[0] != "M"}
+        for t in range(1, self.T):
+            self.assertEqual(
+                self.dbn.infer_node("P", t, clamped),
+                self.dbn.cpt["P"][("bear", clamped[("P", t - 1)])],
+            )
+        self.check_entry_points()
+
+        self.dbn.clear_persistent_evidence()
+        self.assertEqual(self.dbn.infer_node("P", 1, self.evidence), self.dbn.cpt["P"][("bull", "up")])
+
+    def test_missing_evidence(self):
+        del self.evidence[("P", 1)]
+        evidence_arr = self.dbn.encode_evidence(self.evidence, self.T)
+        with self.assertRaises(ValueError):
+            self.dbn.infer_node_array("P", 2, self.evidence)
+        with self.assertRaises(ValueError):
+            self.dbn.infer_node_fast(self.dbn.slice_nodes.index("P"), 2, evidence_arr)
+        with self.assertRaises(ValueError):
+            self.dbn.infer_trajectory(["P"], self.T, self.evidence)
+
+    def test_predict_ties_follow_entry_order(self):
+        self.assertEqual(self.dbn.predict("S", 1, {("P", 1): "up"}), "buy")
+        self.dbn.set_cpt("S", {("up",): {"hold": 0.5, "buy": 0.5}, ("down",): {"sell": 0.9, "hold": 0.1}})
+        self.assertEqual(self.dbn.predict("S", 1, {("P", 1): "up"}), "hold")
+
+    def test_sample_node(self):
+        rng = np.random.default_rng(0)
+        draws = [self.dbn.sample_node("P", 1, self.evidence, rng) for _ in range(4000)]
+        expected = self.expected("P", 1)
+        for value, prob in expected.items():
+            self.assertAlmostEqual(draws.count(value) / len(draws), prob, delta=0.03)
+
+        self.dbn.set_cpt("S", {("up",): {"buy": 0.0, "hold": 1.0}, ("down",): {"sell": 1.0}})
+        self.assertEqual(self.dbn.sample_node("S", 0, {("P", 0): "up"}, rng), "hold")
+
+    def test_deterministic_shortcut(self):
+        evidence = {("M", 1): "bull", ("P", 0): "up"}
+        self.dbn.update_cpt_from_data_batch("P", [(("bull", "up"), "down")] * 200, lr=0.2)
+        self.assertEqual(self.dbn.infer_node("P", 1, evidence), {"up": 0.0, "down": 1.0})
+        labels, probs = self.dbn.infer_node_array("P", 1, evidence)
+        self.assertAlmostEqual(probs[labels.index("down")], 1.0)
+
+        self.dbn.update_cpt_from_data("P", ("bull", "up"), "up", lr=0.5)
+        self.assertEqual(self.dbn.infer_node("P", 1, evidence), self.dbn.cpt["P"][("bull", "up")])
+
+    def test_unroll_array(self):
+        grid = self.dbn.unroll_array(self.T)
+        self.assertEqual(grid.shape, (self.T, 3, 2))
+        self.assertEqual(grid.dtype, np.int32)
+        self.assertEqual(
+            [[(self.dbn.slice_nodes[i], int(t)) for i, t in slice_] for slice_ in grid.tolist()],
+            self.dbn.unroll(self.T),
+        )
+        self.assertEqual(
+            [(t, list(nodes)) for t, nodes in self.dbn.iter_unroll(self.T)],
+            [(t, self.dbn.slice_nodes) for t in range(self.T)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,12 +19,17 @@ except ImportError as e:
     IMPORT_ERROR = str(e)
 
 from typing import Optional, Tuple
+
+import numpy as np
+
 from dbn import DynamicBayesianNetwork
 
 
 class DBNVisualizer:
     """Visualizer for Dynamic Bayesian Network structures."""
     
+    __slots__ = ('dbn',)
+    
     def __init__(self, dbn: DynamicBayesianNetwork):
         """
         Initialize the visualizer.
@@ -63,38 +68,39 @@ class DBNVisualizer:
         G = nx.DiGraph()
         
         # Add nodes for each time slice
-        node_positions = {}
         y_spacing = 2.0
         x_spacing = 4.0
+        slice_nodes = self.dbn.slice_nodes
+        num_nodes = len(slice_nodes)
         
-        # Calculate vertical positions for nodes
-        num_nodes = len(self.dbn.slice_nodes)
-        y_positions = {}
-        for i, node in enumerate(self.dbn.slice_nodes):
-            y_positions[node] = (num_nodes - 1 - i) * y_spacing
+        # Node positions for every (node, t) as (N, T) grids built by broadcasting
+        xs = np.arange(time_slices) * x_spacing
+        ys = np.arange(num_nodes)[::-1] * y_spacing
+        X, Y = np.meshgrid(xs, ys, indexing='xy')
         
-        # Add nodes and edges for each time slice
-        for t in range(time_slices):
-            x_pos = t * x_spacing
-            
-            # Add nodes for this time slice
-            for node in self.dbn.slice_nodes:
-                node_label = f"{node}_{{{t}}}"
-                G.add_node(node_label)
-                node_positions[node_label] = (x_pos, y_positions[node])
-            
-            # Add intra-slice edges (within time t)
-            for parent, child in self.dbn.intra_edges:
-                parent_label = f"{parent}_{{{t}}}"
-                child_label = f"{child}_{{{t}}}"
-                G.add_edge(parent_label, child_label, edge_type='intra')
-            
-            # Add inter-slice edges (from t-1 to t)
-            if t > 0:
-                for parent, child in self.dbn.inter_edges:
-                    parent_label = f"{parent}_{{{t-1}}}"
-                    child_label = f"{child}_{{{t}}}"
-                    G.add_edge(parent_label, child_label, edge_type='inter')
+        # Format every node label once: labels[t][i] is slice node i at time t
+        name_to_idx = {node: i for i, node in enumerate(slice_nodes)}
+        labels = [[f"{node}_{{{t}}}" for node in slice_nodes] for t in range(time_slices)]
+        
+        xs_grid, ys_grid = X.tolist(), Y.tolist()
+        node_positions = {
+            labels[t][i]: (xs_grid[i][t], ys_grid[i][t])
+            for t in range(time_slices) for i in range(num_nodes)
+        }
+        G.add_nodes_from(node_positions)
+        
+        # Add intra-slice edges (within time t) and inter-slice edges (from t-1 to t)
+        intra_edges = [(name_to_idx[p], name_to_idx[c]) for p, c in self.dbn.intra_edges]
+        inter_edges = [(name_to_idx[p], name_to_idx[c]) for p, c in self.dbn.inter_edges]
+        G.add_edges_from(
+            [(labels[t][p], labels[t][c]) for t in range(time_slices) for p, c in intra_edges],
+            edge_type='intra'
+        )
+        G.add_edges_from(
+            [(labels[t - 1][p], labels[t][c])
+             for t in range(1, time_slices) for p, c in inter_edges],
+            edge_type='inter'
+        )
         
         # Create the plot
         fig, ax = plt.subplots(figsize=figsize)
@@ -164,8 +170,7 @@ class DBNVisualizer:
         
         # Add time slice labels
         for t in range(time_slices):
-            x_pos = t * x_spacing
-            ax.text(x_pos, max(y_positions.values()) + 1, f't = {t}',
+            ax.text(xs[t], ys.max() + 1, f't = {t}',
                    fontsize=14, fontweight='bold', ha='center')
         
         ax.axis('off')